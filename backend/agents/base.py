@@ -1,36 +1,237 @@
 from typing import Dict, List, Any, Optional
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+import aiohttp
+import orjson
+from cachetools import TTLCache
+from config import get_settings
+
+try:
+    from redisvl.extensions.cache.llm import SemanticCache
+    from redisvl.query.filter import Tag
+except ImportError:
+    SemanticCache = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Most recent log entries kept per agent
+HISTORY_LIMIT = 1000
+
+# Agents whose instructions contain this marker always hit the model
+NO_CACHE_MARKER = "no-cache"
+
+# L1: exact prompt match, shared by all agents in the process
+_response_cache: TTLCache = TTLCache(maxsize=10_000, ttl=600)
+# L2: semantic match in Redis, connected by init_semantic_cache when REDIS_URL is set and redisvl is installed
+_semantic_cache = None
+
+def create_ollama_session() -> aiohttp.ClientSession:
+    """Create a pooled aiohttp session for the Ollama API (must be called inside a running loop)"""
+    return aiohttp.ClientSession(
+        base_url=settings.ollama_host,
+        timeout=aiohttp.ClientTimeout(total=60.0, connect=5.0),
+        connector=aiohttp.TCPConnector(limit=200, limit_per_host=200, keepalive_timeout=75),
+        json_serialize=lambda obj: orjson.dumps(obj).decode()
+    )
+
+async def init_semantic_cache():
+    """Connect the Redis semantic cache once at startup, if configured.
+
+    The connection is made off the event loop; if Redis is unreachable the L2 cache stays
+    disabled for the life of the process and lookups fall through to the model.
+    """
+    global _semantic_cache
+    if _semantic_cache is not None or SemanticCache is None or not settings.redis_url:
+        return
+    try:
+        _semantic_cache = await asyncio.to_thread(
+            SemanticCache,
+            name="agent-llm-cache",
+            redis_url=settings.redis_url,
+            distance_threshold=0.1,
+            ttl=600,
+            filterable_fields=[{"name": "model", "type": "tag"}]
+        )
+    except Exception as e:
+        logger.warning(f"Semantic cache disabled: {str(e)}")
 
 class BaseAgent(ABC):
     """Base class for all agent types in multi-agent system"""
     
+    __slots__ = (
+        "agent_id",
+        "agent_type",
+        "model_name",
+        "instructions",
+        "session",
+        "cacheable",
+        "execution_history",
+        "_prompt_prefix",
+        "_prompt_suffix"
+    )
+    
+    # Static prompt parts around the per-call context, overridden by subclasses
+    PROMPT_CONTEXT_HEADER = "Context:"
+    PROMPT_FOOTER = ""
+    
     def __init__(
         self,
         agent_id: str,
         agent_type: str,
         model_name: str,
-        instructions: str
+        instructions: str,
+        session: Optional[aiohttp.ClientSession] = None
     ):
+        # Workflow nodes may carry "instructions": null
+        instructions = instructions or ""
         self.agent_id = agent_id
         self.agent_type = agent_type
         self.model_name = model_name
         self.instructions = instructions
-        self.execution_history = []
+        self.session = session
+        self.cacheable = NO_CACHE_MARKER not in instructions.lower()
+        self.execution_history = deque(maxlen=HISTORY_LIMIT)
+        # Built once per agent so each call only concatenates the variable context
+        self._prompt_prefix = f"{instructions}\n\n{self.PROMPT_CONTEXT_HEADER}\n"
+        self._prompt_suffix = f"\n\n{self.PROMPT_FOOTER}"
     
     @abstractmethod
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute agent with given input"""
         pass
     
+    def _build_prompt(self, context: str) -> str:
+        """Wrap the call context in the agent's precomputed instructions and footer"""
+        return self._prompt_prefix + context + self._prompt_suffix
+    
+    async def _cached_generate(self, prompt: str, token_queue: Optional[asyncio.Queue] = None) -> str:
+        """Generate a completion, serving repeated prompts from the L1/L2 response caches.
+
+        Cacheable calls run at temperature 0 so a cached answer is the one the model would give.
+        """
+        if not self.cacheable:
+            return await self._generate(prompt, token_queue)
+        
+        cache_key = hashlib.sha256(
+            orjson.dumps({"model": self.model_name, "prompt": prompt}, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+        response = _response_cache.get(cache_key)
+        if response is None:
+            response = await self._semantic_lookup(prompt)
+            if response is not None:
+                _response_cache[cache_key] = response
+        
+        if response is not None:
+            if token_queue is not None:
+                await token_queue.put({
+                    "event": "token",
+                    "agent_id": self.agent_id,
+                    "agent_type": self.agent_type,
+                    "token": response,
+                    "cached": True
+                })
+            return response
+        
+        response = await self._generate(prompt, token_queue, options={"temperature": 0})
+        _response_cache[cache_key] = response
+        await self._semantic_store(prompt, response)
+        return response
+    
+    async def _semantic_lookup(self, prompt: str) -> Optional[str]:
+        """Look up a semantically similar prompt in the L2 cache"""
+        if _semantic_cache is None:
+            return None
+        try:
+            hits = await _semantic_cache.acheck(
+                prompt=prompt,
+                num_results=1,
+                filter_expression=Tag("model") == self.model_name
+            )
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            return None
+        return hits[0]["response"] if hits else None
+    
+    async def _semantic_store(self, prompt: str, response: str):
+        """Store a fresh completion in the L2 cache"""
+        if _semantic_cache is None:
+            return
+        try:
+            await _semantic_cache.astore(prompt=prompt, response=response, filters={"model": self.model_name})
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {str(e)}")
+    
+    async def _generate(
+        self,
+        prompt: str,
+        token_queue: Optional[asyncio.Queue] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Stream a completion from Ollama over the shared session and return the full text.
+
+        When a token_queue is given, every token is also forwarded to it as it arrives.
+        """
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True
+        }
+        if options:
+            payload["options"] = options
+        if self.session is None:
+            # No shared session injected (e.g. standalone use): fall back to a one-off session
+            async with create_ollama_session() as session:
+                return await self._post_generate(session, payload, token_queue)
+        return await self._post_generate(self.session, payload, token_queue)
+    
+    async def _post_generate(
+        self,
+        session: aiohttp.ClientSession,
+        payload: Dict[str, Any],
+        token_queue: Optional[asyncio.Queue] = None
+    ) -> str:
+        """POST a generate request and assemble the NDJSON token stream"""
+        parts = []
+        async with session.post("/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                chunk = orjson.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    if token_queue is not None:
+                        await token_queue.put({
+                            "event": "token",
+                            "agent_id": self.agent_id,
+                            "agent_type": self.agent_type,
+                            "token": token
+                        })
+                if chunk.get("done"):
+                    break
+        return "".join(parts)
+    
     async def log_execution(self, action: str, result: Any):
         """Log execution step for debugging"""
-        self.execution_history.append({
-            "action": action,
-            "result": result,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        # Timestamps are formatted lazily in get_history
+        self.execution_history.append((action, result, time.time()))
     
     def get_history(self) -> List[Dict[str, Any]]:
         """Get execution history"""
-        return self.execution_history
\ No newline at end of file
+        return [
+            {
+                "action": action,
+                "result": result,
+                "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+            }
+            for action, result, ts in self.execution_history
+        ]
\ No newline at end of file
@@ -0,0 +1,99 @@
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+import asyncio
+from config import get_settings
+
+settings = get_settings()
+
+GenerateCall = Callable[[], Awaitable[str]]
+
+class OllamaBatcher:
+    """Coalesce concurrent Ollama calls per model into small dispatch batches.
+
+    Ollama has no batch endpoint, so a batch is sent as parallel requests; the
+    per-model semaphore keeps that at the server's OLLAMA_NUM_PARALLEL so extra
+    calls wait here instead of queueing inside Ollama.
+    """
+
+    def __init__(self, max_batch: int = 8, max_wait: float = 0.02, max_concurrency: int = 4):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_concurrency = max_concurrency
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def submit(self, model_name: str, request: GenerateCall) -> str:
+        """Queue a request for model_name and wait for its response"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue_for(model_name).put_nowait((request, future))
+        return await future
+
+    def _queue_for(self, model_name: str) -> asyncio.Queue:
+        # Workers are bound to the loop that started them; a finished worker or one from an
+        # earlier loop (e.g. a previous asyncio.run) is replaced along with its queue
+        worker = self._workers.get(model_name)
+        if worker is None or worker.done() or worker.get_loop() is not asyncio.get_running_loop():
+            queue = self._queues[model_name] = asyncio.Queue()
+            self._limits[model_name] = asyncio.Semaphore(self.max_concurrency)
+            self._workers[model_name] = asyncio.create_task(self._drain(model_name, queue))
+            return queue
+        return self._queues[model_name]
+
+    async def _drain(self, model_name: str, queue: asyncio.Queue):
+        """Collect up to max_batch requests or max_wait seconds' worth, then dispatch them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._dispatch(model_name, batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, model_name: str, batch: List[Tuple[GenerateCall, asyncio.Future]]):
+        limit = self._limits[model_name]
+
+        async def run(request: GenerateCall, future: asyncio.Future):
+            if future.done():
+                return
+            async with limit:
+                # The caller may have given up while this call waited for a slot
+                if future.done():
+                    return
+                task = asyncio.ensure_future(request())
+                # Stop the call as soon as its caller stops waiting so it frees the slot
+                future.add_done_callback(lambda _: task.cancel())
+                try:
+                    response = await task
+                except asyncio.CancelledError:
+                    if future.cancelled():
+                        return
+                    raise
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+            if not future.done():
+                future.set_result(response)
+
+        await asyncio.gather(*(run(request, future) for request, future in batch))
+
+    async def close(self):
+        """Stop the per-model workers and any batches still in flight"""
+        tasks = list(self._workers.values()) + list(self._in_flight)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queues.clear()
+        self._limits.clear()
+        self._workers.clear()
+
+ollama_batcher = OllamaBatcher(max_concurrency=settings.ollama_num_parallel)
\ No newline at end of file
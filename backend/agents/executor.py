@@ -1,13 +1,17 @@
-from typing import Dict, Any
-import httpx
+from typing import Dict, Any, List, Optional
+import asyncio
+import functools
 from agents.base import BaseAgent
-from config import get_settings
-
-settings = get_settings()
+from agents.batcher import ollama_batcher
 
 class ExecutorAgent(BaseAgent):
     """Executor agent that performs individual tasks"""
     
+    __slots__ = ()
+    
+    PROMPT_CONTEXT_HEADER = "Task context:"
+    PROMPT_FOOTER = "Provide a detailed execution of the task."
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a specific task"""
         task = input_data.get("task", "")
@@ -15,7 +19,8 @@ class ExecutorAgent(BaseAgent):
         
         # Execute task
         result = await self._execute_task(
-            f"Task: {task}\n\nPrevious results:\n{previous_results}"
+            f"Task: {task}\n\nPrevious results:\n{previous_results}",
+            input_data.get("token_queue")
         )
         
         await self.log_execution("task_execution", {
@@ -32,26 +37,47 @@ class ExecutorAgent(BaseAgent):
             "status": "completed"
         }
     
-    async def _execute_task(self, context: str) -> str:
-        """Execute task using Ollama"""
-        prompt = f"""{self.instructions}
-
-Task context:
-{context}
-
-Provide a detailed execution of the task."""
+    async def run_steps_parallel(
+        self,
+        steps: List[str],
+        previous_results: List[Dict[str, Any]],
+        token_queue: Optional[asyncio.Queue] = None
+    ) -> List[str]:
+        """Execute independent plan steps concurrently (the batcher caps calls at OLLAMA_NUM_PARALLEL)"""
+        outputs = await asyncio.gather(
+            *(
+                self._execute_task(f"Task: {step}\n\nPrevious results:\n{previous_results}", token_queue)
+                for step in steps
+            ),
+            return_exceptions=True
+        )
+        results = [
+            f"Error executing task: {str(output)}" if isinstance(output, Exception) else output
+            for output in outputs
+        ]
         
+        await self.log_execution("parallel_task_execution", {
+            "tasks": steps,
+            "results": results
+        })
+        
+        return results
+    
+    async def _generate(
+        self,
+        prompt: str,
+        token_queue: Optional[asyncio.Queue] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Route Ollama calls through the shared per-model batcher"""
+        return await ollama_batcher.submit(
+            self.model_name,
+            functools.partial(super()._generate, prompt, token_queue, options)
+        )
+    
+    async def _execute_task(self, context: str, token_queue: Optional[asyncio.Queue] = None) -> str:
+        """Execute task using Ollama"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{settings.ollama_host}/api/generate",
-                    json={
-                        "model": self.model_name,
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
-                response.raise_for_status()
-                return response.json()["response"]
+            return await self._cached_generate(self._build_prompt(context), token_queue)
         except Exception as e:
             return f"Error executing task: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,29 @@
+from typing import Dict, Optional, Type
+import aiohttp
+from agents.base import BaseAgent
+from agents.planner import PlannerAgent
+from agents.executor import ExecutorAgent
+from agents.reviewer import ReviewerAgent
+
+AGENT_FACTORIES: Dict[str, Type[BaseAgent]] = {
+    "planner": PlannerAgent,
+    "executor": ExecutorAgent,
+    "reviewer": ReviewerAgent
+}
+
+def create_agent(agent_type: str,
+                 agent_id: str,
+                 model_name: str,
+                 instructions: str,
+                 session: Optional[aiohttp.ClientSession] = None) -> Optional[BaseAgent]:
+    """Instantiate the agent class registered for agent_type, or None if there isn't one"""
+    factory = AGENT_FACTORIES.get(agent_type)
+    if factory is None:
+        return None
+    return factory(
+        agent_id=agent_id,
+        agent_type=agent_type,
+        model_name=model_name,
+        instructions=instructions,
+        session=session
+    )
\ No newline at end of file
@@ -1,24 +1,43 @@
-from typing import Dict, Any
-import httpx
+from typing import Dict, Any, Optional
+import asyncio
 import json
+import re
 from agents.base import BaseAgent
-from config import get_settings
 
-settings = get_settings()
+# Plan lines: "Step N..." (including "Step N (after ...)") or "- bullet"
+_STEP_RE = re.compile(r"(?m)^[ \t]*(Step[ \t]+\d+\b.*|-[ \t]+.*)$")
+# Optional dependency annotation on a plan step, e.g. "Step 3 (after 1, 2): ..."
+_AFTER_RE = re.compile(r"\(after\s+([^)]*)\)", re.IGNORECASE)
+# Number of a "Step N" line
+_STEP_NUMBER_RE = re.compile(r"Step[ \t]+(\d+)")
 
 class PlannerAgent(BaseAgent):
     """Planner agent that breaks down complex tasks into executable steps"""
     
+    __slots__ = ()
+    
+    PROMPT_CONTEXT_HEADER = "User request:"
+    PROMPT_FOOTER = """Generate a detailed, step-by-step plan to accomplish this task. Format each step clearly:
+Step 1: [action description]
+Step 2: [action description]
+...
+If a step only needs some of the earlier steps, name them, e.g. "Step 3 (after 1): [action description]".
+Use "(after none)" for a step that does not depend on any earlier step."""
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate execution plan from user request"""
         user_query = input_data.get("query", "")
         context = input_data.get("context", "")
         
         # Generate initial plan
-        plan = await self._generate_plan(f"User query: {user_query}\n\nContext: {context}")
+        plan = await self._generate_plan(
+            f"User query: {user_query}\n\nContext: {context}",
+            input_data.get("token_queue")
+        )
         
         # Parse plan into structured steps
         steps = await self._parse_plan(plan)
+        step_graph = self._build_step_graph(steps)
         
         await self.log_execution("plan_generation", {
             "query": user_query,
@@ -31,42 +50,51 @@ class PlannerAgent(BaseAgent):
             "type": "plan",
             "plan": plan,
             "steps": steps,
+            "step_graph": step_graph,
             "num_steps": len(steps),
             "status": "success"
         }
     
-    async def _generate_plan(self, context: str) -> str:
+    async def _generate_plan(self, context: str, token_queue: Optional[asyncio.Queue] = None) -> str:
         """Generate plan using Ollama"""
-        prompt = f"""{self.instructions}
-
-User request:
-{context}
-
-Generate a detailed, step-by-step plan to accomplish this task. Format each step clearly:
-Step 1: [action description]
-Step 2: [action description]
-..."""
-        
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{settings.ollama_host}/api/generate",
-                    json={
-                        "model": self.model_name,
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
-                response.raise_for_status()
-                return response.json()["response"]
+            return await self._cached_generate(self._build_prompt(context), token_queue)
         except Exception as e:
             return f"Error generating plan: {str(e)}"
     
     async def _parse_plan(self, plan_text: str) -> list:
         """Parse plan text into structured steps"""
-        steps = []
-        for line in plan_text.split("\n"):
-            line = line.strip()
-            if line and (line.startswith("Step") or line.startswith("-")):
-                steps.append(line)
-        return steps if steps else ["Execute the planned task"]
\ No newline at end of file
+        steps = [step.strip() for step in _STEP_RE.findall(plan_text)]
+        return steps or ["Execute the planned task"]
+    
+    def _build_step_graph(self, steps: list) -> list:
+        """Tag each step with the (1-based) earlier steps it depends on.
+
+        Steps without an "(after ...)" annotation depend on the step before them,
+        so unannotated plans keep their sequential meaning. "(after N)" refers to the
+        line labelled "Step N" together with the bullet lines under it, not to the
+        N-th parsed line.
+        """
+        # Step number -> index of the last line in that step's group
+        end_of_step = {}
+        current = None
+        graph = []
+        for index, step in enumerate(steps, start=1):
+            number = _STEP_NUMBER_RE.match(step)
+            match = _AFTER_RE.search(step)
+            if match:
+                depends_on = sorted({
+                    end_of_step[int(n)]
+                    for n in re.findall(r"\d+", match.group(1))
+                    if int(n) in end_of_step
+                })
+            else:
+                depends_on = [index - 1] if index > 1 else []
+            if number:
+                current = int(number.group(1))
+                end_of_step.setdefault(current, index)
+            elif current is not None and not match:
+                # An unannotated bullet runs after the line above it, so it extends that step
+                end_of_step[current] = index
+            graph.append({"index": index, "text": step, "depends_on": depends_on})
+        return graph
@@ -1,15 +1,17 @@
-from typing import Dict, Any
-import httpx
+from typing import Dict, Any, Optional
+import asyncio
 import re
-import json
+import orjson
 from agents.base import BaseAgent
-from config import get_settings
-
-settings = get_settings()
 
 class ReviewerAgent(BaseAgent):
     """Reviewer agent that evaluates task completion and results quality"""
     
+    __slots__ = ()
+    
+    PROMPT_CONTEXT_HEADER = "Review context:"
+    PROMPT_FOOTER = "Provide a detailed review. Is the task completed successfully? Answer YES or NO, then provide feedback."
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Review task results and determine if acceptable"""
         task_description = input_data.get("task", "")
@@ -17,7 +19,8 @@ class ReviewerAgent(BaseAgent):
         
         # Evaluate results
         review = await self._evaluate_results(
-            f"Task: {task_description}\n\nExecution results:\n{json.dumps(execution_results, indent=2)}"
+            f"Task: {task_description}\n\nExecution results:\n{orjson.dumps(execution_results, option=orjson.OPT_INDENT_2).decode()}",
+            input_data.get("token_queue")
         )
         
         # Parse review decision
@@ -38,27 +41,10 @@ class ReviewerAgent(BaseAgent):
             "status": "completed"
         }
     
-    async def _evaluate_results(self, context: str) -> str:
+    async def _evaluate_results(self, context: str, token_queue: Optional[asyncio.Queue] = None) -> str:
         """Evaluate task completion and quality"""
-        prompt = f"""{self.instructions}
-
-Review context:
-{context}
-
-Provide a detailed review. Is the task completed successfully? Answer YES or NO, then provide feedback."""
-        
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{settings.ollama_host}/api/generate",
-                    json={
-                        "model": self.model_name,
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
-                response.raise_for_status()
-                return response.json()["response"]
+            return await self._cached_generate(self._build_prompt(context), token_queue)
         except Exception as e:
             return f"Error evaluating results: {str(e)}"
     
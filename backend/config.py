@@ -1,5 +1,7 @@
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Optional
+from functools import lru_cache
 import os
 
 class Settings(BaseSettings):
@@ -10,11 +12,18 @@ class Settings(BaseSettings):
     ollama_model_primary: str = "mistral"
     ollama_model_secondary: str = "llama3"
     ollama_model_tertiary: str = "qwen2"
+    # Keep in line with the Ollama server's OLLAMA_NUM_PARALLEL (concurrent requests per model)
+    ollama_num_parallel: int = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))
+    # Upper bound on one agent's turn in a workflow (planning, execution or review)
+    agent_timeout_seconds: float = float(os.environ.get("AGENT_TIMEOUT_SECONDS", "300"))
     
     # MongoDB Configuration
     mongo_url: str = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
     db_name: str = os.environ.get("DB_NAME", "test_database")
     
+    # Redis Configuration (optional semantic LLM response cache)
+    redis_url: str = os.environ.get("REDIS_URL", "")
+    
     # API Security
     api_secret_key: str = os.environ.get("API_SECRET_KEY", "development-secret-key")
     cors_origins: str = os.environ.get("CORS_ORIGINS", "*")
@@ -23,15 +32,24 @@ class Settings(BaseSettings):
     debug: bool = os.environ.get("DEBUG", "false").lower() == "true"
     log_level: str = os.environ.get("LOG_LEVEL", "INFO")
     
+    _cors_origins: frozenset = PrivateAttr(default_factory=frozenset)
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
     
+    def model_post_init(self, __context: Any) -> None:
+        """Parse comma-separated origins once at init"""
+        self._cors_origins = frozenset(
+            origin.strip() for origin in self.cors_origins.split(",") if origin.strip()
+        )
+    
     @property
-    def cors_origins_list(self) -> list:
-        """Convert comma-separated origins to list"""
-        return [origin.strip() for origin in self.cors_origins.split(",")]
+    def cors_origins_set(self) -> frozenset:
+        """Allowed CORS origins"""
+        return self._cors_origins
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """Get settings instance with caching"""
     return Settings()
\ No newline at end of file
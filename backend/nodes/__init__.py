@@ -1,17 +1,39 @@
-from typing import Dict, Any
+from typing import Dict, List, Any, Tuple
 from abc import ABC, abstractmethod
+from collections import deque
+import asyncio
 import json
+import math
+import re
+import time
 import httpx
 from datetime import datetime, timezone
 
+# Most recent log entries kept per node
+HISTORY_LIMIT = 1000
+
+# {{variable}} placeholders substituted from node input data; keys may contain anything but
+# braces, e.g. {{user-name}} or {{a.b}}
+_VAR_RE = re.compile(r"\{\{([^{}]+)\}\}")
+
+def _lookup_placeholder(match: re.Match, data: Dict[str, Any]) -> str:
+    """Value for one {{key}} match (exact key, then with surrounding spaces stripped), or the match itself"""
+    key = match.group(1)
+    if key in data:
+        return str(data[key])
+    key = key.strip()
+    return str(data[key]) if key in data else match.group(0)
+
 class ManualNode(ABC):
     """Base class for manual workflow nodes (non-AI)"""
     
+    __slots__ = ("node_id", "node_type", "config", "execution_history")
+    
     def __init__(self, node_id: str, node_type: str, config: Dict[str, Any]):
         self.node_id = node_id
         self.node_type = node_type
         self.config = config
-        self.execution_history = []
+        self.execution_history = deque(maxlen=HISTORY_LIMIT)
     
     @abstractmethod
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -20,15 +42,25 @@ class ManualNode(ABC):
     
     async def log_execution(self, action: str, result: Any):
         """Log execution step"""
-        self.execution_history.append({
-            "action": action,
-            "result": result,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        # Timestamps are formatted lazily in get_history
+        self.execution_history.append((action, result, time.time()))
+    
+    def get_history(self) -> List[Dict[str, Any]]:
+        """Get execution history"""
+        return [
+            {
+                "action": action,
+                "result": result,
+                "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+            }
+            for action, result, ts in self.execution_history
+        ]
 
 class HTTPRequestNode(ManualNode):
     """HTTP Request node for API calls"""
     
+    __slots__ = ()
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Make HTTP request"""
         method = self.config.get("method", "GET")
@@ -79,12 +111,13 @@ class HTTPRequestNode(ManualNode):
         """Replace {{variable}} with actual values"""
         if not isinstance(text, str):
             return text
-        for key, value in data.items():
-            text = text.replace(f"{{{{{key}}}}}", str(value))
-        return text
+        return _VAR_RE.sub(lambda m: _lookup_placeholder(m, data), text)
     
     def _replace_variables_in_dict(self, obj: Any, data: Dict[str, Any]) -> Any:
         """Recursively replace variables in dict/list"""
+        if isinstance(obj, (dict, list)) and not _VAR_RE.search(str(obj)):
+            # No placeholders anywhere in this subtree
+            return obj
         if isinstance(obj, dict):
             return {k: self._replace_variables_in_dict(v, data) for k, v in obj.items()}
         elif isinstance(obj, list):
@@ -96,21 +129,15 @@ class HTTPRequestNode(ManualNode):
 class DataTransformNode(ManualNode):
     """Data transformation node"""
     
+    __slots__ = ()
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Transform data"""
         operation = self.config.get("operation", "map")
         
         try:
-            if operation == "map":
-                result = self._map_data(input_data)
-            elif operation == "filter":
-                result = self._filter_data(input_data)
-            elif operation == "reduce":
-                result = self._reduce_data(input_data)
-            elif operation == "custom":
-                result = self._custom_transform(input_data)
-            else:
-                result = input_data
+            handler = self._OPERATIONS.get(operation)
+            result = handler(self, input_data) if handler else input_data
             
             await self.log_execution("data_transform", result)
             return {
@@ -162,10 +189,30 @@ class DataTransformNode(ManualNode):
         # For safety, only allow simple operations
         # In production, use a sandboxed execution environment
         return data
+    
+    # operation -> handler; unknown operations pass the data through unchanged
+    _OPERATIONS = {
+        "map": _map_data,
+        "filter": _filter_data,
+        "reduce": _reduce_data,
+        "custom": _custom_transform
+    }
 
 class ConditionalNode(ManualNode):
     """Conditional branching node"""
     
+    __slots__ = ()
+    
+    # condition_type -> predicate(input_data, field, value); unknown types never match
+    _CONDITIONS = {
+        "equals": lambda data, field, value: data.get(field) == value,
+        "not_equals": lambda data, field, value: data.get(field) != value,
+        "greater_than": lambda data, field, value: float(data.get(field)) > float(value),
+        "less_than": lambda data, field, value: float(data.get(field)) < float(value),
+        "contains": lambda data, field, value: value in str(data.get(field)),
+        "exists": lambda data, field, value: field in data
+    }
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Evaluate condition and return branch"""
         condition_type = self.config.get("condition_type", "equals")
@@ -173,21 +220,8 @@ class ConditionalNode(ManualNode):
         value = self.config.get("value", "")
         
         try:
-            field_value = input_data.get(field)
-            condition_met = False
-            
-            if condition_type == "equals":
-                condition_met = field_value == value
-            elif condition_type == "not_equals":
-                condition_met = field_value != value
-            elif condition_type == "greater_than":
-                condition_met = float(field_value) > float(value)
-            elif condition_type == "less_than":
-                condition_met = float(field_value) < float(value)
-            elif condition_type == "contains":
-                condition_met = value in str(field_value)
-            elif condition_type == "exists":
-                condition_met = field in input_data
+            predicate = self._CONDITIONS.get(condition_type)
+            condition_met = predicate(input_data, field, value) if predicate else False
             
             result = {
                 "condition_met": condition_met,
@@ -212,6 +246,8 @@ class ConditionalNode(ManualNode):
 class WebhookNode(ManualNode):
     """Webhook trigger/receiver node"""
     
+    __slots__ = ()
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process webhook data"""
         webhook_url = self.config.get("webhook_url", "")
@@ -231,16 +267,53 @@ class WebhookNode(ManualNode):
             "result": result
         }
 
+class DelayScheduler:
+    """Coalesces delay node waits into shared timer buckets.
+
+    Every waiter whose deadline falls in the same bucket shares one event and one
+    loop timer, instead of each node scheduling its own sleep.
+    """
+    
+    BUCKET_SECONDS = 0.1
+    # Longer delays gain nothing from coalescing and use a plain sleep
+    MAX_COALESCED_DELAY = 60
+    
+    def __init__(self):
+        self._buckets: Dict[Tuple[asyncio.AbstractEventLoop, int], asyncio.Event] = {}
+    
+    def after(self, delay_seconds: float) -> asyncio.Event:
+        """Return an event set once delay_seconds have passed (rounded up to the bucket)"""
+        loop = asyncio.get_running_loop()
+        bucket = math.ceil((loop.time() + delay_seconds) / self.BUCKET_SECONDS)
+        key = (loop, bucket)
+        event = self._buckets.get(key)
+        if event is None:
+            event = asyncio.Event()
+            self._buckets[key] = event
+            loop.call_at(bucket * self.BUCKET_SECONDS, self._fire, key)
+        return event
+    
+    def _fire(self, key: Tuple[asyncio.AbstractEventLoop, int]):
+        event = self._buckets.pop(key, None)
+        if event is not None:
+            event.set()
+
+delay_scheduler = DelayScheduler()
+
 class DelayNode(ManualNode):
     """Delay/Wait node"""
     
+    __slots__ = ()
+    
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Wait for specified time"""
-        import asyncio
         delay_seconds = self.config.get("delay_seconds", 1)
         
         try:
-            await asyncio.sleep(delay_seconds)
+            if 0 < delay_seconds <= DelayScheduler.MAX_COALESCED_DELAY:
+                await delay_scheduler.after(delay_seconds).wait()
+            else:
+                await asyncio.sleep(delay_seconds)
             
             result = {
                 "delayed_seconds": delay_seconds,
@@ -1,18 +1,27 @@
-from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
 import os
-import uuid
+import hashlib
+import orjson
+import asyncio
 import logging
+import time
+from itertools import islice
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
+from cachetools import TTLCache
+from sortedcontainers import SortedList
 
 from config import get_settings
-from agents.planner import PlannerAgent
-from agents.executor import ExecutorAgent
-from agents.reviewer import ReviewerAgent
+from agents.base import create_ollama_session, init_semantic_cache
+from agents.batcher import ollama_batcher
+from agents.factory import create_agent
 from workflows.builder import MultiAgentWorkflowBuilder
 
 ROOT_DIR = Path(__file__).parent
@@ -20,27 +29,97 @@ load_dotenv(ROOT_DIR / '.env')
 
 settings = get_settings()
 
+_UTC = timezone.utc
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO-8601 string"""
+    return datetime.now(_UTC).isoformat()
+
+@lru_cache(maxsize=1)
+def _iso_for_bucket(bucket: int) -> str:
+    return datetime.fromtimestamp(bucket / 10, _UTC).isoformat()
+
+def _coarse_now_iso() -> str:
+    """Current UTC time truncated to 100ms, formatted once per bucket.
+
+    Only for informational stamps; stored records use _now_iso so their ordering stays exact.
+    """
+    return _iso_for_bucket(time.time_ns() // 100_000_000)
+
+def _new_id() -> str:
+    """Random 128-bit identifier as 32 hex characters"""
+    return os.urandom(16).hex()
+
 mongo_url = os.environ.get('MONGO_URL', '')
 db = None
 client = None
 use_memory_store = True
 
-if mongo_url:
-    try:
-        from motor.motor_asyncio import AsyncIOMotorClient
-        client = AsyncIOMotorClient(mongo_url)
-        db = client[os.environ.get('DB_NAME', 'test_database')]
-        use_memory_store = False
-    except Exception:
-        pass
+class MemoryExecutionStore:
+    """In-memory executions, indexed by id and by workflow in created_at order"""
+    
+    def __init__(self):
+        self.by_id: Dict[str, Dict] = {}
+        self.by_workflow: Dict[str, SortedList] = defaultdict(SortedList)
+    
+    def get(self, execution_id: str) -> Optional[Dict]:
+        return self.by_id.get(execution_id)
+    
+    def add(self, execution_doc: Dict[str, Any]):
+        """Insert or replace an execution, keeping the workflow index in step"""
+        execution_id = execution_doc["execution_id"]
+        previous = self.by_id.get(execution_id)
+        if previous is not None:
+            self.by_workflow[previous["workflow_id"]].discard((previous["created_at"], execution_id))
+        self.by_id[execution_id] = execution_doc
+        self.by_workflow[execution_doc["workflow_id"]].add((execution_doc["created_at"], execution_id))
+    
+    def list_for_workflow(self, workflow_id: str, skip: int, limit: int, before: Optional[str] = None) -> List[Dict]:
+        """A workflow's executions, newest first, optionally only those created before a timestamp"""
+        index = self.by_workflow.get(workflow_id)
+        if not index:
+            return []
+        # The index is oldest first, so take the matching slice from the end and walk it backwards
+        end = index.bisect_left((before,)) if before else len(index)
+        stop = max(end - skip, 0)
+        start = max(stop - limit, 0)
+        return [self.by_id[execution_id] for _, execution_id in index.islice(start, stop, reverse=True)]
 
 memory_workflows: Dict[str, Dict] = {}
-memory_executions: Dict[str, Dict] = {}
+memory_executions = MemoryExecutionStore()
+
+# Serves the per-workflow execution history, newest first
+EXECUTIONS_BY_WORKFLOW_INDEX = [("workflow_id", 1), ("created_at", -1)]
+# Serves cursor pagination of the workflow list
+WORKFLOWS_BY_CREATED_INDEX = [("created_at", 1)]
+# Response header carrying the cursor for the next page of a list endpoint
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Short-lived cache of workflow reads: workflow_id -> (workflow_doc, etag)
+workflow_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+
+# Executions no longer change once they reach one of these
+TERMINAL_EXECUTION_STATUSES = frozenset({"completed", "failed", "needs_revision"})
+# Finished executions by id: execution_id -> (execution_doc, etag)
+execution_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+# MongoDB execution writes are coalesced into insert_many batches by _flush_executions
+EXECUTION_FLUSH_BATCH = 100
+EXECUTION_FLUSH_INTERVAL = 0.05
+_exec_write_queue: Optional[asyncio.Queue] = None
+_exec_flusher: Optional[asyncio.Task] = None
+
+# Agents reused across executions, least recently used first:
+# (workflow_id, node_id, model, agent_type, instructions digest) -> agent
+_AGENT_CACHE_MAX = 256
+_agent_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+_agent_cache_lock = asyncio.Lock()
 
 app = FastAPI(
     title="Multi-Agent AI Workflow Engine",
     description="Build and execute multi-agent AI workflows",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 api_router = APIRouter(prefix="/api")
@@ -90,7 +169,7 @@ class ExecutionResponse(BaseModel):
     workflow_id: str
     status: str
     input: str
-    steps: List[Dict[str, Any]]
+    steps: List[Dict[str, Any]] = []
     final_output: str
     created_at: str
 
@@ -98,6 +177,10 @@ class OllamaModelResponse(BaseModel):
     name: str
     available: bool
 
+# Reused serializers: dump a whole node/edge list in one call instead of per-item model_dump()
+NODE_LIST_ADAPTER = TypeAdapter(List[NodeConfig])
+EDGE_LIST_ADAPTER = TypeAdapter(List[EdgeConfig])
+
 @api_router.get("/")
 async def root():
     return {
@@ -112,30 +195,32 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "workflow-engine",
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": _coarse_now_iso()
     }
 
+AVAILABLE_MODELS = [
+    {"name": "mistral", "available": True},
+    {"name": "llama3", "available": True},
+    {"name": "qwen2", "available": True}
+]
+AVAILABLE_MODELS_JSON = orjson.dumps(AVAILABLE_MODELS)
+
 @api_router.get("/models", response_model=List[OllamaModelResponse])
 async def list_models():
-    models = [
-        {"name": "mistral", "available": True},
-        {"name": "llama3", "available": True},
-        {"name": "qwen2", "available": True}
-    ]
-    return models
+    return Response(content=AVAILABLE_MODELS_JSON, media_type="application/json")
 
 @api_router.post("/workflows", response_model=WorkflowResponse, status_code=201)
 async def create_workflow(workflow: WorkflowCreate):
     try:
-        workflow_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
+        workflow_id = _new_id()
+        now = _now_iso()
 
         workflow_doc = {
             "id": workflow_id,
             "name": workflow.name,
             "description": workflow.description,
-            "nodes": [node.model_dump() for node in workflow.nodes],
-            "edges": [edge.model_dump() for edge in workflow.edges],
+            "nodes": NODE_LIST_ADAPTER.dump_python(workflow.nodes),
+            "edges": EDGE_LIST_ADAPTER.dump_python(workflow.edges),
             "created_at": now,
             "updated_at": now
         }
@@ -144,34 +229,87 @@ async def create_workflow(workflow: WorkflowCreate):
             memory_workflows[workflow_id] = workflow_doc
         else:
             await db.workflows.insert_one(workflow_doc)
-
-        return WorkflowResponse(**workflow_doc)
+        workflow_cache.pop(workflow_id, None)
+
+        # Everything here came from the validated request, so skip a second validation pass
+        return WorkflowResponse.model_construct(
+            id=workflow_id,
+            name=workflow.name,
+            description=workflow.description,
+            nodes=workflow.nodes,
+            edges=workflow.edges,
+            created_at=now,
+            updated_at=now
+        )
 
     except Exception as e:
         logger.error(f"Error creating workflow: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _paged_response(docs: List[Dict[str, Any]], limit: int) -> ORJSONResponse:
+    """Encode a page of stored documents, adding the next-page cursor when the page is full"""
+    headers = {NEXT_CURSOR_HEADER: docs[-1]["created_at"]} if len(docs) == limit else None
+    return ORJSONResponse(docs, headers=headers)
+
 @api_router.get("/workflows", response_model=List[WorkflowResponse])
-async def list_workflows():
+async def list_workflows(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """List workflows oldest first; pass a page's X-Next-Cursor header back as cursor for the next one"""
     try:
         if use_memory_store:
-            return list(memory_workflows.values())
-        workflows = await db.workflows.find({}, {"_id": 0}).to_list(100)
-        return workflows
+            workflows = memory_workflows.values()
+            if cursor:
+                workflows = (w for w in workflows if w["created_at"] > cursor)
+            workflows = list(islice(workflows, skip, skip + limit))
+        else:
+            query = {"created_at": {"$gt": cursor}} if cursor else {}
+            workflows = await db.workflows.find(query, {"_id": 0}).sort(WORKFLOWS_BY_CREATED_INDEX).skip(skip).limit(limit).batch_size(limit).to_list(limit)
+        # Stored documents already match WorkflowResponse; hand them straight to orjson
+        return _paged_response(workflows, limit)
     except Exception as e:
         logger.error(f"Error listing workflows: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _make_etag(*parts: str) -> str:
+    """Quoted ETag from the fields that change whenever a document does"""
+    return '"' + hashlib.blake2b(":".join(parts).encode(), digest_size=8).hexdigest() + '"'
+
+async def _load_workflow(workflow_id: str) -> Optional[tuple]:
+    """Fetch a workflow and its ETag, going through the workflow cache"""
+    cached = workflow_cache.get(workflow_id)
+    if cached is not None:
+        return cached
+    if use_memory_store:
+        workflow = memory_workflows.get(workflow_id)
+    else:
+        workflow = await db.workflows.find_one({"id": workflow_id}, {"_id": 0})
+    if not workflow:
+        return None
+    etag = _make_etag(workflow_id, workflow["updated_at"])
+    workflow_cache[workflow_id] = (workflow, etag)
+    return workflow, etag
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
 @api_router.get("/workflows/{workflow_id}", response_model=WorkflowResponse)
-async def get_workflow(workflow_id: str):
+async def get_workflow(workflow_id: str, request: Request):
     try:
-        if use_memory_store:
-            workflow = memory_workflows.get(workflow_id)
-        else:
-            workflow = await db.workflows.find_one({"id": workflow_id}, {"_id": 0})
-        if not workflow:
+        loaded = await _load_workflow(workflow_id)
+        if not loaded:
             raise HTTPException(status_code=404, detail="Workflow not found")
-        return workflow
+        workflow, etag = loaded
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        # Stored documents already match WorkflowResponse, so encode them without a validation pass
+        return Response(content=orjson.dumps(workflow), media_type="application/json", headers={"ETag": etag})
     except HTTPException:
         raise
     except Exception as e:
@@ -189,6 +327,10 @@ async def delete_workflow(workflow_id: str):
             result = await db.workflows.delete_one({"id": workflow_id})
             if result.deleted_count == 0:
                 raise HTTPException(status_code=404, detail="Workflow not found")
+        workflow_cache.pop(workflow_id, None)
+        async with _agent_cache_lock:
+            for key in [key for key in _agent_cache if key[0] == workflow_id]:
+                del _agent_cache[key]
         return {"message": "Workflow deleted successfully"}
     except HTTPException:
         raise
@@ -196,70 +338,205 @@ async def delete_workflow(workflow_id: str):
         logger.error(f"Error deleting workflow: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/workflows/execute", response_model=ExecutionResponse)
-async def execute_workflow(request: WorkflowExecuteRequest, background_tasks: BackgroundTasks):
+def _build_execution_doc(
+    execution_id: str,
+    request: WorkflowExecuteRequest,
+    result: Dict[str, Any],
+    created_at: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the stored execution record from a builder result"""
+    return {
+        "execution_id": execution_id,
+        "workflow_id": request.workflow_id,
+        "status": result.get("status", "completed"),
+        "input": request.input,
+        "steps": result.get("steps", []),
+        "final_output": result.get("final_output", ""),
+        "created_at": created_at or _now_iso()
+    }
+
+async def _save_execution(execution_doc: Dict[str, Any]):
+    """Persist an execution record to the active store"""
+    if not execution_doc:
+        return
+    if use_memory_store:
+        memory_executions.add(execution_doc)
+        return
+    # Resolved by the flusher once the batch holding this document is written
+    future = asyncio.get_running_loop().create_future()
+    _exec_write_queue.put_nowait((execution_doc, future))
+    await future
+
+async def _replace_execution(execution_doc: Dict[str, Any]):
+    """Overwrite a previously saved execution record"""
+    if use_memory_store:
+        memory_executions.add(execution_doc)
+    else:
+        await db.executions.replace_one({"execution_id": execution_doc["execution_id"]}, execution_doc)
+
+async def _run_and_persist(
+    builder: MultiAgentWorkflowBuilder,
+    request: WorkflowExecuteRequest,
+    execution_id: str,
+    created_at: str
+):
+    """Run a workflow in the background and replace its pending record with the outcome"""
     try:
-        if use_memory_store:
-            workflow = memory_workflows.get(request.workflow_id)
+        result = await builder.execute_workflow(
+            user_input=request.input,
+            workflow_config=request.context
+        )
+    except Exception as e:
+        logger.error(f"Error executing workflow: {str(e)}")
+        result = {"status": "failed", "final_output": str(e)}
+    try:
+        await _replace_execution(_build_execution_doc(execution_id, request, result, created_at))
+    except Exception as e:
+        logger.error(f"Error saving execution: {str(e)}")
+
+async def _flush_executions():
+    """Write queued executions with insert_many, up to EXECUTION_FLUSH_BATCH per round-trip"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _exec_write_queue.get()]
+        deadline = loop.time() + EXECUTION_FLUSH_INTERVAL
+        while len(batch) < EXECUTION_FLUSH_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_exec_write_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            await db.executions.insert_many([doc for doc, _ in batch], ordered=False)
+        except Exception as e:
+            logger.error(f"Error saving executions: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
         else:
-            workflow = await db.workflows.find_one({"id": request.workflow_id}, {"_id": 0})
-        if not workflow:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+        finally:
+            for _ in batch:
+                _exec_write_queue.task_done()
+
+async def _stream_execution(
+    builder: MultiAgentWorkflowBuilder,
+    request: WorkflowExecuteRequest,
+    execution_id: str,
+    execution_doc: Dict[str, Any]
+):
+    """Yield NDJSON events for a running workflow, filling execution_doc once it finishes"""
+    token_queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(builder.execute_workflow(
+        user_input=request.input,
+        workflow_config=request.context,
+        token_queue=token_queue
+    ))
+    task.add_done_callback(lambda _: token_queue.put_nowait(None))
+
+    try:
+        yield orjson.dumps({"event": "start", "execution_id": execution_id}) + b"\n"
+        while True:
+            event = await token_queue.get()
+            if event is None:
+                break
+            yield orjson.dumps(event) + b"\n"
+
+        execution_doc.update(_build_execution_doc(execution_id, request, task.result()))
+        yield orjson.dumps({"event": "result", "execution": execution_doc}) + b"\n"
+    finally:
+        # Client went away mid-stream: stop burning Ollama time on an unread response
+        if not task.done():
+            task.cancel()
+
+@api_router.post("/workflows/execute", response_model=ExecutionResponse)
+async def execute_workflow(
+    request: WorkflowExecuteRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    stream: bool = False,
+    wait: bool = False,
+    run_async: bool = Query(False, alias="async")
+):
+    try:
+        loaded = await _load_workflow(request.workflow_id)
+        if not loaded:
             raise HTTPException(status_code=404, detail="Workflow not found")
+        workflow, _ = loaded
 
         agents = {}
-        for node in workflow["nodes"]:
-            if node["type"] == "agent":
+        async with _agent_cache_lock:
+            for node in workflow["nodes"]:
+                if node["type"] != "agent":
+                    continue
                 agent_type = node.get("agent_type", "executor")
                 model = node.get("model", "mistral")
-                instructions = node.get("instructions", f"You are a {agent_type} agent.")
-
-                if agent_type == "planner":
-                    agents["planner"] = PlannerAgent(
-                        agent_id=node["id"],
-                        agent_type="planner",
-                        model_name=model,
-                        instructions=instructions
-                    )
-                elif agent_type == "executor":
-                    agents["executor"] = ExecutorAgent(
+                instructions = node.get("instructions") or f"You are a {agent_type} agent."
+                key = (
+                    request.workflow_id,
+                    node["id"],
+                    model,
+                    agent_type,
+                    hashlib.blake2b(instructions.encode(), digest_size=8).hexdigest()
+                )
+
+                agent = _agent_cache.get(key)
+                if agent is not None:
+                    _agent_cache.move_to_end(key)
+                else:
+                    agent = create_agent(
+                        agent_type,
                         agent_id=node["id"],
-                        agent_type="executor",
                         model_name=model,
-                        instructions=instructions
-                    )
-                elif agent_type == "reviewer":
-                    agents["reviewer"] = ReviewerAgent(
-                        agent_id=node["id"],
-                        agent_type="reviewer",
-                        model_name=model,
-                        instructions=instructions
+                        instructions=instructions,
+                        session=app.state.ollama
                     )
+                    if agent is None:
+                        continue
+                    _agent_cache[key] = agent
+                    if len(_agent_cache) > _AGENT_CACHE_MAX:
+                        _agent_cache.popitem(last=False)
+                agents[agent_type] = agent
 
         builder = MultiAgentWorkflowBuilder(agents=agents)
+        execution_id = _new_id()
+
+        if run_async:
+            # Saved before responding so the execution is readable right away; the background
+            # task replaces the record once the workflow finishes
+            pending_doc = _build_execution_doc(execution_id, request, {"status": "pending"})
+            await _save_execution(pending_doc)
+            background_tasks.add_task(_run_and_persist, builder, request, execution_id, pending_doc["created_at"])
+            response.status_code = 202
+            return ExecutionResponse.model_construct(**pending_doc)
+
+        if stream:
+            # Filled in by the stream once the workflow completes, then persisted after the response
+            execution_doc: Dict[str, Any] = {}
+            background_tasks.add_task(_save_execution, execution_doc)
+            return StreamingResponse(
+                _stream_execution(builder, request, execution_id, execution_doc),
+                media_type="application/x-ndjson",
+                background=background_tasks
+            )
+
         result = await builder.execute_workflow(
             user_input=request.input,
             workflow_config=request.context
         )
 
-        execution_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
-
-        execution_doc = {
-            "execution_id": execution_id,
-            "workflow_id": request.workflow_id,
-            "status": result.get("status", "completed"),
-            "input": request.input,
-            "steps": result.get("steps", []),
-            "final_output": result.get("final_output", ""),
-            "created_at": now
-        }
-
-        if use_memory_store:
-            memory_executions[execution_id] = execution_doc
+        execution_doc = _build_execution_doc(execution_id, request, result)
+        if wait or use_memory_store:
+            await _save_execution(execution_doc)
         else:
-            await db.executions.insert_one(execution_doc)
+            # Keep the MongoDB round-trip off the response path; ?wait=true restores read-after-write
+            background_tasks.add_task(_save_execution, dict(execution_doc))
 
-        return ExecutionResponse(**execution_doc)
+        return ExecutionResponse.model_construct(**execution_doc)
 
     except HTTPException:
         raise
@@ -267,16 +544,36 @@ async def execute_workflow(request: WorkflowExecuteRequest, background_tasks: Ba
         logger.error(f"Error executing workflow: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _load_execution(execution_id: str) -> Optional[tuple]:
+    """Fetch an execution and its ETag; finished executions are served from execution_cache"""
+    cached = execution_cache.get(execution_id)
+    if cached is not None:
+        return cached
+    if use_memory_store:
+        execution = memory_executions.get(execution_id)
+    else:
+        execution = await db.executions.find_one({"execution_id": execution_id}, {"_id": 0})
+    if not execution:
+        return None
+    # Status is part of the tag because a pending record is replaced in place once it finishes
+    loaded = (execution, _make_etag(execution_id, execution["status"], execution["created_at"]))
+    if execution["status"] in TERMINAL_EXECUTION_STATUSES:
+        execution_cache[execution_id] = loaded
+    return loaded
+
 @api_router.get("/executions/{execution_id}", response_model=ExecutionResponse)
-async def get_execution(execution_id: str):
+async def get_execution(execution_id: str, request: Request):
     try:
-        if use_memory_store:
-            execution = memory_executions.get(execution_id)
-        else:
-            execution = await db.executions.find_one({"execution_id": execution_id}, {"_id": 0})
-        if not execution:
+        loaded = await _load_execution(execution_id)
+        if not loaded:
             raise HTTPException(status_code=404, detail="Execution not found")
-        return execution
+        execution, etag = loaded
+        headers = {"ETag": etag}
+        if execution["status"] in TERMINAL_EXECUTION_STATUSES:
+            headers["Cache-Control"] = "public, max-age=300"
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=orjson.dumps(execution), media_type="application/json", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -284,36 +581,140 @@ async def get_execution(execution_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/executions/workflow/{workflow_id}", response_model=List[ExecutionResponse])
-async def list_workflow_executions(workflow_id: str):
+async def list_workflow_executions(
+    workflow_id: str,
+    include_steps: bool = True,
+    include_output: bool = True,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """List a workflow's executions newest first; pass a page's X-Next-Cursor header back as cursor for the next one"""
     try:
+        # Fields left out of a summary listing; they come back empty to keep the response shape
+        omitted = {}
+        if not include_steps:
+            omitted["steps"] = []
+        if not include_output:
+            omitted["final_output"] = ""
+
         if use_memory_store:
-            execs = [e for e in memory_executions.values() if e["workflow_id"] == workflow_id]
-            execs.sort(key=lambda x: x["created_at"], reverse=True)
-            return execs[:50]
-        executions = await db.executions.find(
-            {"workflow_id": workflow_id},
-            {"_id": 0}
-        ).sort("created_at", -1).to_list(50)
-        return executions
+            executions = memory_executions.list_for_workflow(workflow_id, skip, limit, before=cursor)
+            if omitted:
+                executions = [{**e, **omitted} for e in executions]
+        else:
+            query = {"workflow_id": workflow_id}
+            if cursor:
+                query["created_at"] = {"$lt": cursor}
+            projection = {"_id": 0, **{field: 0 for field in omitted}}
+            executions = await db.executions.find(
+                query,
+                projection
+            ).sort("created_at", -1).hint(EXECUTIONS_BY_WORKFLOW_INDEX).skip(skip).limit(limit).batch_size(limit).to_list(limit)
+            for execution in executions:
+                execution.update(omitted)
+        # Encoded as stored, without a pass through ExecutionResponse
+        return _paged_response(executions, limit)
     except Exception as e:
         logger.error(f"Error listing executions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 app.include_router(api_router)
 
+# A wildcard can't be combined with credentials per the CORS spec, so "*" takes the plain
+# allow-all path; otherwise the frozenset gives the middleware O(1) origin checks
+allow_all_origins = "*" in settings.cors_origins_set
 app.add_middleware(
     CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
+    allow_credentials=not allow_all_origins,
+    allow_origins=["*"] if allow_all_origins else settings.cors_origins_set,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
+    # Browsers cache preflight results for a day instead of sending OPTIONS before each call
+    max_age=86400,
 )
 
+@app.on_event("startup")
+async def startup_db_client():
+    # Created inside the running loop so every worker process gets its own client bound to its loop
+    global db, client, use_memory_store
+    if not mongo_url:
+        return
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(
+            mongo_url,
+            serverSelectionTimeoutMS=2000,
+            uuidRepresentation="standard",
+            maxPoolSize=100,
+            minPoolSize=10
+        )
+        # Only switch off the memory store once the server has actually answered
+        await asyncio.wait_for(client.admin.command("ping"), 3)
+        db = client[os.environ.get('DB_NAME', 'test_database')]
+        use_memory_store = False
+    except Exception as e:
+        logger.error(f"MongoDB unavailable, using in-memory store: {str(e) or type(e).__name__}")
+        if client:
+            client.close()
+        client = None
+
+@app.on_event("startup")
+async def create_db_indexes():
+    if use_memory_store:
+        return
+    try:
+        await db.executions.create_index(EXECUTIONS_BY_WORKFLOW_INDEX)
+        await db.executions.create_index("execution_id", unique=True)
+        await db.workflows.create_index("id", unique=True)
+        await db.workflows.create_index(WORKFLOWS_BY_CREATED_INDEX)
+    except Exception as e:
+        logger.error(f"Error creating indexes: {str(e)}")
+
+@app.on_event("startup")
+async def start_execution_flusher():
+    global _exec_write_queue, _exec_flusher
+    if use_memory_store:
+        return
+    _exec_write_queue = asyncio.Queue()
+    _exec_flusher = asyncio.create_task(_flush_executions())
+
+@app.on_event("startup")
+async def startup_ollama_session():
+    # One pooled session shared by every agent so Ollama calls reuse keep-alive connections
+    app.state.ollama = create_ollama_session()
+
+@app.on_event("startup")
+async def startup_semantic_cache():
+    await init_semantic_cache()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if _exec_flusher:
+        # Let queued execution writes land before the client goes away
+        try:
+            await asyncio.wait_for(_exec_write_queue.join(), 5)
+        except asyncio.TimeoutError:
+            logger.error("Timed out flushing execution writes on shutdown")
+        _exec_flusher.cancel()
     if client:
         client.close()
+    await ollama_batcher.close()
+    # Cached agents hold the session closed below; a later startup must build fresh ones
+    _agent_cache.clear()
+    await app.state.ollama.close()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="localhost", port=8001)
+    from importlib.util import find_spec
+    # One worker: the workflow/execution/agent caches and the in-memory store are per-process,
+    # so a second worker would keep serving a workflow after another one updated or deleted it
+    # uvloop isn't available on Windows (see requirements.txt); fall back to the stock loop there
+    uvicorn.run(
+        "server:app",
+        host="localhost",
+        port=8001,
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11"
+    )
@@ -1,9 +1,13 @@
-from typing import Dict, Any, List, Annotated, Literal
+from typing import Dict, Any, List, Annotated, Literal, Optional
 from typing_extensions import TypedDict
 import operator
+import asyncio
 from agents.planner import PlannerAgent
 from agents.executor import ExecutorAgent
 from agents.reviewer import ReviewerAgent
+from config import get_settings
+
+settings = get_settings()
 
 class WorkflowState(TypedDict):
     """State shared across all workflow nodes"""
@@ -19,11 +23,28 @@ class WorkflowState(TypedDict):
 class MultiAgentWorkflowBuilder:
     """Build and execute multi-agent workflows"""
     
+    # Agent -> agents whose output it reads. The executor sees the plan through
+    # previous_results, so it waits for the planner unless the workflow opts out.
+    AGENT_DEPENDENCIES = {
+        "planner": (),
+        "executor": ("planner",),
+        "reviewer": ("planner", "executor")
+    }
+    # Canonical order of recorded steps, whatever order agents finish in
+    AGENT_ORDER = ("planner", "executor", "reviewer")
+    STEP_NAMES = {"planner": "planning", "executor": "execution", "reviewer": "review"}
+    
     def __init__(self, agents: Dict[str, Any]):
         self.agents = agents
     
-    async def execute_workflow(self, user_input: str, workflow_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute multi-agent workflow"""
+    async def execute_workflow(self,
+                             user_input: str,
+                             workflow_config: Dict[str, Any],
+                             token_queue: Optional[asyncio.Queue] = None) -> Dict[str, Any]:
+        """Execute multi-agent workflow, forwarding agent tokens to token_queue if given.
+
+        Agents run in dependency levels; agents in the same level run concurrently.
+        """
         
         results = {
             "input": user_input,
@@ -32,58 +53,152 @@ class MultiAgentWorkflowBuilder:
             "status": "running"
         }
         
+        dependencies = dict(self.AGENT_DEPENDENCIES)
+        if not workflow_config.get("executor_uses_plan", True):
+            dependencies["executor"] = ()
+        timeout = workflow_config.get("agent_timeout", settings.agent_timeout_seconds)
+        # Bound once: these are read for every agent in the chain
+        steps = results["steps"]
+        run_agent = self._run_agent
+        agent_order = self.AGENT_ORDER
+        step_names = self.STEP_NAMES
+        
         try:
-            # Step 1: Planning
-            if "planner" in self.agents:
-                planner_result = await self.agents["planner"].execute({
-                    "query": user_input,
-                    "context": workflow_config.get("context", "")
-                })
-                results["steps"].append({
-                    "step": "planning",
-                    "agent": "planner",
-                    "result": planner_result
-                })
-                plan = planner_result.get("plan", "")
-            else:
-                plan = "Execute task directly"
+            agent_results = {}
+            for level in self._agent_levels(dependencies):
+                tasks = {
+                    name: asyncio.create_task(asyncio.wait_for(
+                        run_agent(name, user_input, workflow_config, steps, agent_results, token_queue),
+                        timeout
+                    ))
+                    for name in level
+                }
+                try:
+                    await asyncio.gather(*tasks.values())
+                except BaseException:
+                    for task in tasks.values():
+                        task.cancel()
+                    raise
+                for name in agent_order:
+                    task = tasks.get(name)
+                    if task:
+                        result = agent_results[name] = task.result()
+                        steps.append({
+                            "step": step_names[name],
+                            "agent": name,
+                            "result": result
+                        })
             
-            # Step 2: Execution
-            if "executor" in self.agents:
-                executor_result = await self.agents["executor"].execute({
-                    "task": user_input,
-                    "previous_results": results["steps"]
-                })
-                results["steps"].append({
-                    "step": "execution",
-                    "agent": "executor",
-                    "result": executor_result
-                })
-                execution_output = executor_result.get("result", "")
-            else:
-                execution_output = plan
-            
-            # Step 3: Review
-            if "reviewer" in self.agents:
-                reviewer_result = await self.agents["reviewer"].execute({
-                    "task": user_input,
-                    "results": results["steps"]
-                })
-                results["steps"].append({
-                    "step": "review",
-                    "agent": "reviewer",
-                    "result": reviewer_result
-                })
-                approved = reviewer_result.get("approved", True)
-            else:
-                approved = True
+            planner_result = agent_results.get("planner")
+            executor_result = agent_results.get("executor")
+            reviewer_result = agent_results.get("reviewer")
+            plan = planner_result.get("plan", "") if planner_result else "Execute task directly"
+            execution_output = executor_result.get("result", "") if executor_result else plan
+            approved = reviewer_result.get("approved", True) if reviewer_result else True
             
             results["final_output"] = execution_output
             results["status"] = "completed" if approved else "needs_revision"
             results["approved"] = approved
             
+        except asyncio.TimeoutError:
+            results["error"] = f"Agent timed out after {timeout}s"
+            results["status"] = "failed"
         except Exception as e:
             results["error"] = str(e)
             results["status"] = "failed"
         
-        return results
\ No newline at end of file
+        return results
+    
+    def _agent_levels(self, dependencies: Dict[str, tuple]) -> List[List[str]]:
+        """Group the configured agents so each one's dependencies sit in an earlier level"""
+        agents = self.agents
+        level_of = {}
+        levels: List[List[str]] = []
+        for name in self.AGENT_ORDER:
+            if not agents.get(name):
+                continue
+            level = max((level_of[dep] + 1 for dep in dependencies[name] if dep in level_of), default=0)
+            level_of[name] = level
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(name)
+        return levels
+    
+    async def _run_agent(self,
+                         name: str,
+                         user_input: str,
+                         workflow_config: Dict[str, Any],
+                         steps: List[Dict[str, Any]],
+                         agent_results: Dict[str, Any],
+                         token_queue: Optional[asyncio.Queue] = None) -> Dict[str, Any]:
+        """Run one agent with the inputs it expects, given the steps recorded so far"""
+        agent = self.agents[name]
+        if name == "planner":
+            return await agent.execute({
+                "query": user_input,
+                "context": workflow_config.get("context", ""),
+                "token_queue": token_queue
+            })
+        if name == "executor":
+            step_graph = agent_results.get("planner", {}).get("step_graph", [])
+            if workflow_config.get("parallel_steps") and step_graph:
+                return await self._execute_plan_steps(user_input, step_graph, steps, token_queue)
+            return await agent.execute({
+                "task": user_input,
+                "previous_results": steps,
+                "token_queue": token_queue
+            })
+        return await agent.execute({
+            "task": user_input,
+            "results": steps,
+            "token_queue": token_queue
+        })
+    
+    async def _execute_plan_steps(self,
+                                  user_input: str,
+                                  step_graph: List[Dict[str, Any]],
+                                  previous_results: List[Dict[str, Any]],
+                                  token_queue: Optional[asyncio.Queue] = None) -> Dict[str, Any]:
+        """Execute plan steps level by level, running the steps of each level concurrently"""
+        executor = self.agents["executor"]
+        step_results = {}
+        
+        for level in self._group_steps_by_level(step_graph):
+            completed = [
+                {"step": step_graph[index - 1]["text"], "result": result}
+                for index, result in step_results.items()
+            ]
+            outputs = await executor.run_steps_parallel(
+                [step["text"] for step in level],
+                previous_results + completed,
+                token_queue
+            )
+            for step, output in zip(level, outputs):
+                step_results[step["index"]] = output
+        
+        ordered = [
+            {"step": step["text"], "depends_on": step["depends_on"], "result": step_results[step["index"]]}
+            for step in step_graph
+        ]
+        return {
+            "agent_id": executor.agent_id,
+            "type": "execution",
+            "task": user_input,
+            "result": "\n\n".join(item["result"] for item in ordered),
+            "step_results": ordered,
+            "success": True,
+            "status": "completed"
+        }
+    
+    @staticmethod
+    def _group_steps_by_level(step_graph: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group steps so every step's dependencies sit in an earlier level"""
+        level_of = {}
+        levels: List[List[Dict[str, Any]]] = []
+        for step in step_graph:
+            level = max((level_of[dep] + 1 for dep in step["depends_on"] if dep in level_of), default=0)
+            level_of[step["index"]] = level
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(step)
+        return levels
\ No newline at end of file
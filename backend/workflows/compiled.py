@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+EdgePairs = Tuple[Tuple[str, str], ...]
+
+@dataclass(slots=True)
+class CompiledWorkflow:
+    """A workflow graph resolved once to its topological order.
+
+    order holds positions in node_ids.
+    """
+    node_ids: List[str]
+    order: List[int]
+    
+    def ordered_node_ids(self) -> List[str]:
+        """Node ids in execution order"""
+        node_ids = self.node_ids
+        return [node_ids[idx] for idx in self.order]
+
+@lru_cache(maxsize=1024)
+def compile_workflow(edge_pairs: EdgePairs, start_node_id: Optional[str] = None) -> CompiledWorkflow:
+    """Compile (source, target) pairs into a CompiledWorkflow with a topological order.
+
+    Nodes are numbered in first-seen order (target before source within an edge), which is also
+    the order start nodes are visited in. Edges never change after a workflow is created, so
+    results are cached on the pairs themselves.
+    """
+    node_index: Dict[str, int] = {}
+    for source, target in edge_pairs:
+        node_index.setdefault(target, len(node_index))
+        node_index.setdefault(source, len(node_index))
+    if start_node_id:
+        node_index.setdefault(start_node_id, len(node_index))
+    
+    adj: List[List[int]] = [[] for _ in node_index]
+    in_degree = [0] * len(node_index)
+    for source, target in edge_pairs:
+        dst = node_index[target]
+        adj[node_index[source]].append(dst)
+        in_degree[dst] += 1
+    
+    # Kahn's algorithm
+    if start_node_id:
+        queue = deque([node_index[start_node_id]])
+    else:
+        queue = deque(idx for idx, degree in enumerate(in_degree) if degree == 0)
+    order = []
+    while queue:
+        idx = queue.popleft()
+        order.append(idx)
+        for neighbor in adj[idx]:
+            in_degree[neighbor] -= 1
+            if in_degree[neighbor] == 0:
+                queue.append(neighbor)
+    
+    return CompiledWorkflow(node_ids=list(node_index), order=order)
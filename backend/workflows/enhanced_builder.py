@@ -1,8 +1,9 @@
-from typing import Dict, Any, List
-from agents.planner import PlannerAgent
-from agents.executor import ExecutorAgent
-from agents.reviewer import ReviewerAgent
+from typing import Dict, Any, List, Optional, Type
+import aiohttp
+from agents.factory import create_agent
+from workflows.compiled import CompiledWorkflow, compile_workflow
 from nodes import (
+    ManualNode,
     HTTPRequestNode,
     DataTransformNode,
     ConditionalNode,
@@ -10,11 +11,20 @@ from nodes import (
     DelayNode
 )
 
+NODE_FACTORIES: Dict[str, Type[ManualNode]] = {
+    "http_request": HTTPRequestNode,
+    "data_transform": DataTransformNode,
+    "conditional": ConditionalNode,
+    "webhook": WebhookNode,
+    "delay": DelayNode
+}
+
 class EnhancedWorkflowBuilder:
     """Build and execute workflows with both AI agents and manual nodes"""
     
-    def __init__(self, nodes_config: List[Dict[str, Any]]):
+    def __init__(self, nodes_config: List[Dict[str, Any]], session: Optional[aiohttp.ClientSession] = None):
         self.nodes = {}
+        self.session = session
         self._initialize_nodes(nodes_config)
     
     def _initialize_nodes(self, nodes_config: List[Dict[str, Any]]):
@@ -24,64 +34,22 @@ class EnhancedWorkflowBuilder:
             node_type = node_config.get("type")
             
             if node_type == "agent":
-                agent_type = node_config.get("agent_type")
-                model = node_config.get("model", "mistral")
-                instructions = node_config.get("instructions", "")
-                
-                if agent_type == "planner":
-                    self.nodes[node_id] = PlannerAgent(
-                        agent_id=node_id,
-                        agent_type="planner",
-                        model_name=model,
-                        instructions=instructions
-                    )
-                elif agent_type == "executor":
-                    self.nodes[node_id] = ExecutorAgent(
-                        agent_id=node_id,
-                        agent_type="executor",
-                        model_name=model,
-                        instructions=instructions
-                    )
-                elif agent_type == "reviewer":
-                    self.nodes[node_id] = ReviewerAgent(
-                        agent_id=node_id,
-                        agent_type="reviewer",
-                        model_name=model,
-                        instructions=instructions
-                    )
-            
-            elif node_type == "http_request":
-                self.nodes[node_id] = HTTPRequestNode(
-                    node_id=node_id,
-                    node_type="http_request",
-                    config=node_config.get("config", {})
-                )
-            
-            elif node_type == "data_transform":
-                self.nodes[node_id] = DataTransformNode(
-                    node_id=node_id,
-                    node_type="data_transform",
-                    config=node_config.get("config", {})
+                agent = create_agent(
+                    node_config.get("agent_type"),
+                    agent_id=node_id,
+                    model_name=node_config.get("model", "mistral"),
+                    instructions=node_config.get("instructions", ""),
+                    session=self.session
                 )
+                if agent is not None:
+                    self.nodes[node_id] = agent
+                continue
             
-            elif node_type == "conditional":
-                self.nodes[node_id] = ConditionalNode(
+            factory = NODE_FACTORIES.get(node_type)
+            if factory is not None:
+                self.nodes[node_id] = factory(
                     node_id=node_id,
-                    node_type="conditional",
-                    config=node_config.get("config", {})
-                )
-            
-            elif node_type == "webhook":
-                self.nodes[node_id] = WebhookNode(
-                    node_id=node_id,
-                    node_type="webhook",
-                    config=node_config.get("config", {})
-                )
-            
-            elif node_type == "delay":
-                self.nodes[node_id] = DelayNode(
-                    node_id=node_id,
-                    node_type="delay",
+                    node_type=node_type,
                     config=node_config.get("config", {})
                 )
     
@@ -97,19 +65,20 @@ class EnhancedWorkflowBuilder:
             "status": "running"
         }
         
-        # Build execution order from edges
-        execution_order = self._build_execution_order(edges, start_node_id)
+        # Compiled graph (cached per edge list) with its execution order
+        compiled = self._compile(edges, start_node_id)
+        node_ids = compiled.node_ids
         
         # Execute nodes in order
         current_data = {"input": user_input}
         
         try:
-            for node_id in execution_order:
-                if node_id not in self.nodes:
+            for idx in compiled.order:
+                node_id = node_ids[idx]
+                node = self.nodes.get(node_id)
+                if node is None:
                     continue
                 
-                node = self.nodes[node_id]
-                
                 # Execute node
                 node_result = await node.execute(current_data)
                 
@@ -120,9 +89,11 @@ class EnhancedWorkflowBuilder:
                     "result": node_result
                 })
                 
-                # Update current data with node output
+                # Update current data with node output (one flat dict, merged in place)
                 if node_result.get("success"):
-                    current_data.update(node_result.get("result", {}))
+                    node_output = node_result.get("result")
+                    if node_output:
+                        current_data.update(node_output)
                 else:
                     # Stop execution on error
                     results["status"] = "failed"
@@ -139,42 +110,15 @@ class EnhancedWorkflowBuilder:
         
         return results
     
+    def _compile(self,
+                 edges: List[Dict[str, Any]],
+                 start_node_id: str = None) -> CompiledWorkflow:
+        """Compile the edge list into index form; identical edge lists share one compiled graph"""
+        edge_pairs = tuple((edge.get("source"), edge.get("target")) for edge in edges)
+        return compile_workflow(edge_pairs, start_node_id)
+    
     def _build_execution_order(self, 
                               edges: List[Dict[str, Any]], 
                               start_node_id: str = None) -> List[str]:
         """Build execution order from edges (topological sort)"""
-        # Build adjacency list
-        graph = {}
-        in_degree = {}
-        
-        for edge in edges:
-            source = edge.get("source")
-            target = edge.get("target")
-            
-            if source not in graph:
-                graph[source] = []
-            graph[source].append(target)
-            
-            in_degree[target] = in_degree.get(target, 0) + 1
-            if source not in in_degree:
-                in_degree[source] = 0
-        
-        # Find start nodes (no incoming edges)
-        if start_node_id:
-            queue = [start_node_id]
-        else:
-            queue = [node for node, degree in in_degree.items() if degree == 0]
-        
-        execution_order = []
-        
-        while queue:
-            node = queue.pop(0)
-            execution_order.append(node)
-            
-            if node in graph:
-                for neighbor in graph[node]:
-                    in_degree[neighbor] -= 1
-                    if in_degree[neighbor] == 0:
-                        queue.append(neighbor)
-        
-        return execution_order
\ No newline at end of file
+        return self._compile(edges, start_node_id).ordered_node_ids()
\ No newline at end of file
@@ -33,10 +33,19 @@ const ExecutionMonitor = () => {
 
   const loadWorkflows = async () => {
     try {
-      const response = await axios.get(`${API}/workflows`);
-      updateWorkflows(response.data);
-      if (response.data.length > 0 && !selectedWorkflow) {
-        setSelectedWorkflow(response.data[0]);
+      // The list is paged; follow X-Next-Cursor until the last page
+      const workflows = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(`${API}/workflows`, {
+          params: cursor ? { cursor } : {}
+        });
+        workflows.push(...response.data);
+        cursor = response.headers['x-next-cursor'];
+      } while (cursor);
+      updateWorkflows(workflows);
+      if (workflows.length > 0 && !selectedWorkflow) {
+        setSelectedWorkflow(workflows[0]);
       }
     } catch (error) {
       console.error('Error loading workflows:', error);
@@ -0,0 +1,76 @@
+"""
+Pytest entry point for the Multi-Agent Workflow API tests in backend_test.py.
+
+These hit a running API, so they only run when API_BASE_URL is set:
+    API_BASE_URL=http://localhost:8001/api pytest -n 4 --dist=loadscope tests/
+loadscope keeps the workflow lifecycle class on one worker, so its steps run in order and
+share ids, while the stateless checks are free to run on other workers.
+"""
+
+import os
+import pytest
+
+BASE_URL = os.environ.get("API_BASE_URL")
+if not BASE_URL:
+    pytest.skip("API_BASE_URL not set; the API tests need a running server", allow_module_level=True)
+
+from backend_test import MultiAgentAPITester, log_buffer
+
+def _check(tester: MultiAgentAPITester, test, *args):
+    """Run one tester check and fail with the details of every result it logged as failed"""
+    start = len(tester.results)
+    test(*args)
+    failures = [f"{name} {details}" for name, success, details in tester.results[start:] if not success]
+    if failures:
+        pytest.fail("\n".join(failures), pytrace=False)
+
+@pytest.fixture(scope="session")
+def tester():
+    t = MultiAgentAPITester(base_url=BASE_URL, pin_dns=True)
+    yield t
+    t.close()
+
+@pytest.fixture(autouse=True)
+def flush_test_log():
+    """Write each test's buffered tester output while pytest is still capturing that test"""
+    yield
+    log_buffer.flush()
+
+def test_health_check(tester):
+    _check(tester, tester.test_health_check)
+
+def test_models_endpoint(tester):
+    _check(tester, tester.test_models_endpoint)
+
+class TestWorkflowLifecycle:
+    """Create, read, execute and delete one workflow; each step needs the ids from the last"""
+
+    @pytest.mark.dependency()
+    def test_create_workflow(self, tester):
+        _check(tester, tester.test_create_workflow)
+
+    @pytest.mark.dependency(depends=["TestWorkflowLifecycle::test_create_workflow"])
+    def test_list_workflows(self, tester):
+        _check(tester, tester.test_list_workflows)
+
+    @pytest.mark.dependency(depends=["TestWorkflowLifecycle::test_create_workflow"])
+    def test_get_workflow(self, tester):
+        _check(tester, tester.test_get_workflow)
+
+    @pytest.mark.dependency(depends=["TestWorkflowLifecycle::test_create_workflow"])
+    def test_execute_workflow(self, tester):
+        _check(tester, tester.test_execute_workflow)
+
+    @pytest.mark.dependency(depends=["TestWorkflowLifecycle::test_execute_workflow"])
+    def test_list_executions(self, tester):
+        _check(tester, tester.test_list_executions)
+
+    @pytest.mark.dependency(depends=["TestWorkflowLifecycle::test_execute_workflow"])
+    def test_get_execution(self, tester):
+        if not tester.execution_id:
+            pytest.skip("No execution ID available")
+        _check(tester, tester.test_get_execution)
+
+    @pytest.mark.dependency(depends=["TestWorkflowLifecycle::test_create_workflow"])
+    def test_delete_workflow(self, tester):
+        _check(tester, tester.test_delete_workflow)
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Unit tests for the per-model Ollama batcher in backend/agents/batcher.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# batcher reads its concurrency default from the backend settings
+pytest.importorskip("pydantic_settings")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from agents.batcher import OllamaBatcher
+
+def test_cancelled_submits_are_not_sent():
+    calls = []
+
+    async def scenario():
+        batcher = OllamaBatcher(max_batch=4, max_wait=0.01, max_concurrency=1)
+        release = asyncio.Event()
+
+        def request(n):
+            async def call():
+                calls.append(n)
+                await release.wait()
+                return f"response {n}"
+            return call
+
+        submits = [asyncio.create_task(batcher.submit("mistral", request(n))) for n in range(4)]
+        await asyncio.sleep(0.05)
+        # Call 0 holds the only slot; give up on it and on two of the queued calls
+        for task in submits[:3]:
+            task.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        result = await submits[3]
+        await batcher.close()
+        return result
+
+    assert asyncio.run(scenario()) == "response 3"
+    assert calls == [0, 3]
+
+def test_submit_works_across_event_loops():
+    batcher = OllamaBatcher(max_wait=0.01)
+
+    async def scenario(text):
+        async def call():
+            return text
+        return await asyncio.wait_for(batcher.submit("mistral", call), 1)
+
+    assert asyncio.run(scenario("first")) == "first"
+    assert asyncio.run(scenario("second")) == "second"
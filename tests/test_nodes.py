@@ -0,0 +1,35 @@
+"""
+Unit tests for placeholder substitution in backend/nodes/__init__.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("httpx")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from nodes import HTTPRequestNode
+
+@pytest.fixture
+def node():
+    return HTTPRequestNode(node_id="http-1", node_type="http_request", config={})
+
+def test_word_keys_are_substituted(node):
+    assert node._replace_variables("/users/{{id}}", {"id": 7}) == "/users/7"
+
+def test_keys_with_punctuation_are_substituted(node):
+    data = {"user-name": "ada", "a.b": "x"}
+    assert node._replace_variables("{{user-name}}/{{a.b}}", data) == "ada/x"
+
+def test_spaces_around_keys_are_ignored(node):
+    assert node._replace_variables("{{ id }}", {"id": 7}) == "7"
+
+def test_unknown_placeholders_are_left_as_is(node):
+    assert node._replace_variables("{{missing}} {{id}}", {"id": 7}) == "{{missing}} 7"
+
+def test_nested_bodies_are_substituted(node):
+    body = {"user": {"name": "{{user-name}}"}, "tags": ["{{tag}}", "fixed"]}
+    data = {"user-name": "ada", "tag": "admin"}
+    assert node._replace_variables_in_dict(body, data) == {"user": {"name": "ada"}, "tags": ["admin", "fixed"]}
@@ -0,0 +1,50 @@
+"""
+Unit tests for plan parsing in backend/agents/planner.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# The agents package pulls in aiohttp and the backend settings
+pytest.importorskip("aiohttp")
+pytest.importorskip("pydantic_settings")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from agents.planner import PlannerAgent
+
+MIXED_PLAN = """Step 1: Collect the sales data
+- Pull last quarter's exports
+- Merge regional files
+Step 2 (after none): Draft the report outline
+Step 3 (after 1, 2): Write the analysis
+- Highlight the top regions
+Step 4 (after 3): Summarize recommendations"""
+
+def _graph(plan: str) -> list:
+    planner = PlannerAgent("planner-1", "planner", "mistral", "Plan the task")
+    return planner._build_step_graph(asyncio.run(planner._parse_plan(plan)))
+
+def test_after_refers_to_step_numbers_not_line_positions():
+    graph = _graph(MIXED_PLAN)
+    assert [step["text"][:6] for step in graph] == ["Step 1", "- Pull", "- Merg", "Step 2", "Step 3", "- High", "Step 4"]
+    depends_on = {step["index"]: step["depends_on"] for step in graph}
+    # Bullets follow the line above them
+    assert depends_on[2] == [1]
+    assert depends_on[3] == [2]
+    assert depends_on[4] == []
+    # "(after 1, 2)" waits for step 1's last bullet and for the Step 2 line
+    assert depends_on[5] == [3, 4]
+    assert depends_on[6] == [5]
+    # "(after 3)" waits for step 3's bullet too
+    assert depends_on[7] == [6]
+
+def test_unknown_and_forward_references_are_ignored():
+    graph = _graph("Step 1 (after 2): First\nStep 2 (after 1, 9): Second")
+    assert [step["depends_on"] for step in graph] == [[], [1]]
+
+def test_unannotated_plan_stays_sequential():
+    graph = _graph("Step 1: A\n- detail\nStep 2: B")
+    assert [step["depends_on"] for step in graph] == [[], [1], [2]]